@@ -16,7 +16,8 @@ def load_params(consensus: str):
         p = json.load(open("config/hybrid_config.json"))
     return p
 
-def load_config(consensus: str, seed: int, target_blocks: int = 10):
+def load_config(consensus: str, seed: int, target_blocks: int = 10, nodes: int = len(DEFAULT_PORTS),
+                base_port: int = DEFAULT_PORTS[0], overrides=None):
     base = os.path.dirname(__file__)
     if consensus == "pow":
         path = os.path.join(base, "config", "pow_config.json")
@@ -28,8 +29,23 @@ def load_config(consensus: str, seed: int, target_blocks: int = 10):
     with open(path, "r") as f:
         cfg = json.load(f)
 
+    # ghi đè từ --set KEY=JSON (vd. block_time_ms=300, stakes=[100,200,300])
+    for item in overrides or []:
+        key, _, raw = item.partition("=")
+        try:
+            cfg[key] = json.loads(raw)
+        except ValueError:
+            cfg[key] = raw
+
+    # số node khác 5: bổ sung/cắt bớt balances và stakes theo số node
+    balances = list(cfg.get("initial_balances") or [1000] * nodes)
+    cfg["initial_balances"] = (balances + [1000] * nodes)[:nodes]
+    if "stakes" in cfg:
+        cfg["stakes"] = (list(cfg["stakes"]) + [100] * nodes)[:nodes]
+
     cfg["seed"] = seed
     cfg["target_blocks"] = target_blocks
+    cfg["ports"] = [base_port + i for i in range(nodes)]
     return cfg
 
 def mark_ready(node_id: int, total: int):
@@ -65,13 +81,18 @@ def main():
     parser.add_argument("--scenario", choices=["delays","partition"], required=True)
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--target-blocks", type=int, default=10)
+    parser.add_argument("--nodes", type=int, default=len(DEFAULT_PORTS))
+    parser.add_argument("--base-port", type=int, default=DEFAULT_PORTS[0])
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=JSON",
+                        help="override a config value, e.g. --set block_time_ms=300")
     args = parser.parse_args()
 
     # load config JSON
-    config = load_config(args.consensus, args.seed, args.target_blocks)
+    config = load_config(args.consensus, args.seed, args.target_blocks,
+                         args.nodes, args.base_port, args.set)
 
     # peers = tất cả port trừ node hiện tại
-    peers = [p for i, p in enumerate(DEFAULT_PORTS) if i != args.node_id]
+    peers = [p for i, p in enumerate(config["ports"]) if i != args.node_id]
 
     # log_path
     log_path = os.path.join("logs", f"node_{args.node_id}.log")
@@ -86,7 +107,7 @@ def main():
         log_path
     )
     node.start()
-    mark_ready(args.node_id, len(DEFAULT_PORTS))
+    mark_ready(args.node_id, args.nodes)
     time.sleep(1.0)
     
     sim = Simulator(node, args.scenario, args.seed, args.target_blocks)
@@ -100,11 +121,14 @@ def main():
     except KeyboardInterrupt:
         pass
     finally:
+        node.log("finish", height=node.bc.length() - 1,
+                 chain=[blk.hash[:8] for blk in node.bc.chain])
+
         # báo hiệu node đã xong
-        mark_done(args.node_id, len(DEFAULT_PORTS))
+        mark_done(args.node_id, args.nodes)
 
         # chờ tất cả node khác cũng xong rồi mới stop
-        wait_all_done(len(DEFAULT_PORTS))
+        wait_all_done(args.nodes)
 
         node.stop()
 
@@ -0,0 +1,4 @@
+@echo off
+rem Vi du: scripts\run_sweep.bat --seeds 1 2 3 --workers 2
+cd /d %~dp0\..
+.venv\Scripts\python sweep.py %*
@@ -14,7 +14,7 @@ class ConsensusAlgorithm(ABC):
     def create_block(self, prev_block: Block, mempool: List[dict]) -> Optional[Block]: ...
 
     @abstractmethod
-    def validate_block(self, block: Block) -> bool: ...
+    def validate_block(self, block: Block, parent_chain: Optional[List[Block]] = None) -> bool: ...
 
     @abstractmethod
     def select_best(self, local_chain: List[Block], candidate_chain: List[Block]) -> List[Block]: ...
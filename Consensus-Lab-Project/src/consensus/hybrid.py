@@ -1,7 +1,8 @@
 import time, random
 from typing import List, Optional, Dict, Any
 from core.block import Block
-from core.crypto import hash_block
+from core.crypto import hash_block, meets_difficulty
+from consensus.mining import NONCE_SPACE, header_bytes, pow_hash, search_range
 
 class HybridConsensus:
     """
@@ -10,6 +11,10 @@ class HybridConsensus:
     - Chỉ leader mới mine block, mất block_time_ms mili-giây
     - Sinh ticket deterministic từ (seed, height, leader)
     - Hash block dựa trên body + ticket
+    - Nếu leader chính im lặng quá rank * leader_timeout_ms (tính từ lúc thấy tip),
+      backup leader thứ `rank` (xếp hạng theo stake cho từng height) được phép mine,
+      kèm light PoW (light_difficulty) và xếp dưới leader chính trong select_best
+    - select_best không bao giờ chọn chain khác block đã final (sâu finality_depth) của chain local
     """
 
     def __init__(self, node_id: int, config: Dict[str, Any]):
@@ -18,6 +23,10 @@ class HybridConsensus:
         self.stakes = list(config.get("stakes", [100, 100, 100, 100, 100]))
         self.seed = int(config.get("seed", 0))
         self.block_time_ms = int(config.get("block_time_ms", 300))
+        self.leader_timeout_ms = int(config.get("leader_timeout_ms", 1000))
+        self.light_difficulty = int(config.get("light_difficulty", 2))
+        self.finality_depth = int(config.get("finality_depth", 4))
+        self._tip_seen = ("", 0.0)  # (hash tip, thời điểm local thấy tip đó)
 
     def _leader_for_height(self, h: int) -> int:
         total = sum(self.stakes)
@@ -29,44 +38,84 @@ class HybridConsensus:
                 return i
         return 0
 
+    def _ranking_for_height(self, h: int) -> List[int]:
+        """
+        [leader chính, backup 1, backup 2, ...]: backup rút theo stake, không hoàn lại;
+        node có stake 0 xếp cuối (theo thứ tự node_id).
+        """
+        primary = self._leader_for_height(h)
+        rnd = random.Random((self.seed << 20) ^ (h << 8) ^ 0xB)
+        rest = [i for i in range(len(self.stakes)) if i != primary and self.stakes[i] > 0]
+        zero = [i for i in range(len(self.stakes)) if i != primary and self.stakes[i] <= 0]
+        order = [primary]
+        while rest:
+            pick = rnd.choices(rest, weights=[self.stakes[i] for i in rest])[0]
+            order.append(pick)
+            rest.remove(pick)
+        return order + zero
+
     def _ticket_for(self, height: int, leader: int) -> int:
         rnd = random.Random((self.seed << 20) ^ (height << 8) ^ (leader << 4))
         return rnd.randint(0, 2**32 - 1)
 
     def mine_block(self, bc, txs: list) -> Optional[Block]:
-        leader = self._leader_for_height(bc.length())
-        if leader != self.node_id:
-            return None  # không phải lượt của mình
+        tip = bc.tip()
+        if self._tip_seen[0] != tip.hash:
+            self._tip_seen = (tip.hash, time.time())
+
+        ranking = self._ranking_for_height(bc.length())
+        rank = ranking.index(self.node_id)
+        leader = ranking[0]
 
-        time.sleep(self.block_time_ms / 1000.0)
+        if rank == 0:
+            time.sleep(self.block_time_ms / 1000.0)
+        else:
+            waited_ms = (time.time() - self._tip_seen[1]) * 1000.0
+            if waited_ms < rank * self.leader_timeout_ms:
+                return None  # chưa tới lượt backup của mình
 
         b = Block(
             height=bc.length(),
-            prev_hash=bc.tip().hash,
+            prev_hash=tip.hash,
             transactions=txs,
             timestamp=time.time(),
             proposer=self.node_id,
             nonce=0,
             extra={"leader": leader}
         )
-        b.extra["ticket"] = self._ticket_for(b.height, leader)
+        b.extra["ticket"] = self._ticket_for(b.height, self.node_id)
+        if rank > 0:
+            # backup block: light PoW
+            b.extra["rank"] = rank
+            nonce, _ = search_range(header_bytes(b), 0, NONCE_SPACE, self.light_difficulty * 4)
+            if nonce is None:
+                return None
+            b.nonce = nonce
 
         body = b.__dict__.copy()
         body["hash"] = ""
         b.hash = hash_block(body)
         return b
 
-    def validate_block(self, block: Block) -> bool:
-        expected_leader = self._leader_for_height(block.height)
-        if block.proposer != expected_leader:
-            print(f"[Node {self.node_id}] Reject block {block.height}: proposer {block.proposer} != expected {expected_leader}")
+    def validate_block(self, block: Block, parent_chain: Optional[List[Block]] = None) -> bool:
+        ranking = self._ranking_for_height(block.height)
+        if block.proposer not in ranking:
+            print(f"[Node {self.node_id}] Reject block {block.height}: unknown proposer {block.proposer}")
+            return False
+        rank = ranking.index(block.proposer)
+        if block.extra.get("rank", 0) != rank:
+            print(f"[Node {self.node_id}] Reject block {block.height}: rank {block.extra.get('rank', 0)} != expected {rank}")
             return False
 
-        expected_ticket = self._ticket_for(block.height, expected_leader)
+        expected_ticket = self._ticket_for(block.height, block.proposer)
         if block.extra.get("ticket") != expected_ticket:
             print(f"[Node {self.node_id}] Reject block {block.height}: ticket mismatch")
             return False
 
+        if rank > 0 and not meets_difficulty(pow_hash(header_bytes(block), block.nonce), self.light_difficulty):
+            print(f"[Node {self.node_id}] Reject block {block.height}: backup block without light PoW")
+            return False
+
         body = block.__dict__.copy()
         body["hash"] = ""
         if hash_block(body) != block.hash:
@@ -76,10 +125,17 @@ class HybridConsensus:
         return True
 
     def select_best(self, local_chain: List[Block], candidate_chain: List[Block]) -> List[Block]:
+        # backup leader có thể tạo fork sâu (vd. khi partition): không revert block đã final
+        final_h = len(local_chain) - 1 - self.finality_depth
+        if final_h >= 0 and (len(candidate_chain) <= final_h
+                             or candidate_chain[final_h].hash != local_chain[final_h].hash):
+            return local_chain
         if len(candidate_chain) != len(local_chain):
             return candidate_chain if len(candidate_chain) > len(local_chain) else local_chain
-        # tie-breaker: chuỗi nào có tổng stake lớn hơn trong 10 block cuối sẽ thắng
+        # tie-breaker: ưu tiên chuỗi ít block backup hơn (tổng rank nhỏ hơn) trong 10 block cuối,
+        # sau đó chuỗi nào có tổng stake lớn hơn sẽ thắng
         def score(chain):
             last = chain[-10:]
-            return sum(self.stakes[b.proposer or 0] for b in last)
+            return (-sum(b.extra.get("rank", 0) for b in last),
+                    sum(self.stakes[b.proposer or 0] for b in last))
         return candidate_chain if score(candidate_chain) > score(local_chain) else local_chain
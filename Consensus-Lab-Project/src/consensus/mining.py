@@ -0,0 +1,130 @@
+import hashlib, os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Optional, Tuple
+from core.block import Block
+from core.crypto import _canonical
+
+NONCE_SPACE = 2**32
+CHECK_EVERY = 4096  # số nonce giữa 2 lần kiểm tra cờ dừng
+
+_STOP = None  # multiprocessing.Event, gán trong mỗi worker
+
+
+def header_bytes(block: Block) -> bytes:
+    """
+    Serialized header dùng cho PoW thật: mọi field trừ nonce và hash,
+    transactions được thay bằng tx_root. Nonce được nối vào cuối để
+    worker chỉ cần hash tiếp từ midstate.
+    """
+    return _canonical({
+        "height": block.height,
+        "prev_hash": block.prev_hash,
+        "tx_root": hashlib.sha256(_canonical(block.transactions)).hexdigest(),
+        "timestamp": block.timestamp,
+        "proposer": block.proposer,
+        "extra": block.extra,
+    })
+
+
+def pow_hash(header: bytes, nonce: int) -> str:
+    return hashlib.sha256(header + nonce.to_bytes(8, "big")).hexdigest()
+
+
+def search_range(header: bytes, start: int, end: int, bits: int) -> Tuple[Optional[int], int]:
+    """Quét nonce trong [start, end). Trả về (nonce tìm được hoặc None, số hash đã tính)."""
+    mid = hashlib.sha256(header)  # midstate của header, copy() cho mỗi nonce
+    target = 1 << (256 - bits)
+    n = start
+    while n < end:
+        batch_end = min(n + CHECK_EVERY, end)
+        for nonce in range(n, batch_end):
+            h = mid.copy()
+            h.update(nonce.to_bytes(8, "big"))
+            if int.from_bytes(h.digest(), "big") < target:
+                return nonce, nonce - start + 1
+        n = batch_end
+        if _STOP is not None and _STOP.is_set():
+            break
+    return None, n - start
+
+
+def _init_worker(stop):
+    global _STOP
+    _STOP = stop
+
+
+class NonceSearcher:
+    """
+    Chia không gian nonce thành các đoạn `chunk` và phân phối cho process pool.
+    - workers <= 1: quét ngay trong process hiện tại (không tạo pool)
+    - should_abort() được gọi định kỳ; trả True => hủy (vd. có block cạnh tranh)
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk: int = 1 << 16):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.chunk = chunk
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stop = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn (không fork): worker không thừa kế socket đang listen của Server
+            ctx = mp.get_context("spawn")
+            self._stop = ctx.Event()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(self._stop,),
+            )
+        return self._pool
+
+    def search(self, header: bytes, bits: int, should_abort: Callable[[], bool]) -> Tuple[Optional[int], int]:
+        if self.workers <= 1:
+            return self._search_local(header, bits, should_abort)
+
+        pool = self._ensure_pool()
+        self._stop.clear()
+        next_start = 0
+        pending = set()
+        found, hashes = None, 0
+
+        def refill():
+            nonlocal next_start
+            while len(pending) < self.workers * 2 and next_start < NONCE_SPACE:
+                end = min(next_start + self.chunk, NONCE_SPACE)
+                pending.add(pool.submit(search_range, header, next_start, end, bits))
+                next_start = end
+
+        refill()
+        while pending:
+            done, pending = wait(pending, timeout=0.02, return_when=FIRST_COMPLETED)
+            for f in done:
+                nonce, n = f.result()
+                hashes += n
+                if nonce is not None and found is None:
+                    found = nonce
+                    self._stop.set()  # báo các worker khác dừng
+            if not self._stop.is_set():
+                if should_abort():
+                    self._stop.set()
+                else:
+                    refill()
+        return found, hashes
+
+    def _search_local(self, header: bytes, bits: int, should_abort: Callable[[], bool]) -> Tuple[Optional[int], int]:
+        hashes = 0
+        for start in range(0, NONCE_SPACE, CHECK_EVERY):
+            nonce, n = search_range(header, start, start + CHECK_EVERY, bits)
+            hashes += n
+            if nonce is not None:
+                return nonce, hashes
+            if should_abort():
+                break
+        return None, hashes
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
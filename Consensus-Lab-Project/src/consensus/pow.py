@@ -1,14 +1,24 @@
 import time, random
 from typing import List, Optional, Dict, Any
 from core.block import Block
-from core.crypto import hash_block
+from core.crypto import hash_block, meets_difficulty_bits
+from consensus.mining import NonceSearcher, header_bytes, pow_hash
 
 class PoWConsensus:
     """
-    Simulated PoW (no brute-force):
-    - Mỗi block mất block_time_ms mili-giây để 'mine'
-    - Sinh ticket deterministic từ (seed, height, node_id)
-    - Hash block dựa trên body + ticket
+    PoW với 2 chế độ (config "mode"):
+    - "simulated" (mặc định, no brute-force):
+        - Mỗi block mất block_time_ms mili-giây để 'mine'
+        - Sinh ticket deterministic từ (seed, height, node_id)
+        - Hash block dựa trên body + ticket
+    - "mine" (PoW thật, CPU-bound):
+        - Tìm nonce sao cho sha256(header || nonce) có đủ số bit 0 đầu
+        - Độ khó khởi đầu = difficulty (số chữ số hex 0), lưu dạng bit trong extra["bits"]
+        - Retarget mỗi block theo block_time_ms, dựa trên timestamp retarget_window block cuối;
+          validator tính lại bits từ chain cha, nên miner không tự chọn được độ khó
+        - select_best chọn chain có tổng work (sum 2**bits) lớn hơn, không phải chain dài hơn,
+          nhưng không bao giờ revert block đã final (sâu finality_depth) của chain local
+        - Hủy tìm kiếm ngay khi tip thay đổi (có block cạnh tranh)
     """
 
     def __init__(self, node_id: int, config: Dict[str, Any]):
@@ -16,13 +26,39 @@ class PoWConsensus:
         self.config = config
         self.seed = int(config.get("seed", 0))
         self.block_time_ms = int(config.get("block_time_ms", 500))
+        self.mode = config.get("mode", "simulated")
+        self.bits = int(config.get("difficulty", 4)) * 4
+        # sàn độ khó mặc định = độ khó khởi đầu: khoảng cách block gồm cả thời gian broadcast
+        # (delay của scenario), nên retarget có thể kéo độ khó xuống tới mức gần như không hash
+        self.min_bits = int(config.get("min_difficulty", config.get("difficulty", 4))) * 4
+        self.retarget_window = int(config.get("retarget_window", 8))
+        self.finality_depth = int(config.get("finality_depth", 4))
+        self.workers = config.get("mining_workers")  # None => dùng tất cả core
+        self.last_mining: Optional[Dict[str, Any]] = None  # thống kê lần mine gần nhất (hashrate...)
+        self._searcher: Optional[NonceSearcher] = None
 
     def _ticket_for(self, height: int) -> int:
         rng = random.Random(self.seed + height)
         val = rng.randint(0, 2**32 - 1)
         return val
 
-    def mine_block(self, bc, txs: list) -> Block:
+    def _retarget(self, chain: List[Block]) -> int:
+        """Độ khó (bit) cho block nối sau chain: +/-1 bit so với tip tùy thời gian block trung bình."""
+        bits = int(chain[-1].extra.get("bits", self.bits))
+        recent = chain[1:][-(self.retarget_window + 1):]
+        if len(recent) < 2:
+            return bits
+        avg_ms = (recent[-1].timestamp - recent[0].timestamp) * 1000.0 / (len(recent) - 1)
+        if avg_ms < self.block_time_ms * 0.7:
+            bits += 1
+        elif avg_ms > self.block_time_ms * 1.4:
+            bits -= 1
+        return max(self.min_bits, bits)
+
+    def mine_block(self, bc, txs: list) -> Optional[Block]:
+        if self.mode == "mine":
+            return self._mine_real(bc, txs)
+
         # simulate mining delay
         time.sleep(self.block_time_ms / 1000.0)
 
@@ -42,12 +78,67 @@ class PoWConsensus:
         b.hash = hash_block(body)
         return b
 
-    def validate_block(self, block: Block) -> bool:
-        expected = self._ticket_for(block.height)
-        actual = block.extra.get("ticket")
-        if actual != expected:
-            print(f"[Node {self.node_id}] FAIL ticket h={block.height}, expected={expected}, got={actual}")
-            return False
+    def _mine_real(self, bc, txs: list) -> Optional[Block]:
+        if self._searcher is None:
+            self._searcher = NonceSearcher(self.workers)
+
+        prev = bc.tip()
+        b = Block(
+            height=bc.length(),
+            prev_hash=prev.hash,
+            transactions=txs,
+            timestamp=time.time(),
+            proposer=self.node_id,
+            nonce=0,
+            extra={"bits": self._retarget(bc.chain)}
+        )
+
+        t0 = time.time()
+        nonce, hashes = self._searcher.search(
+            header_bytes(b), b.extra["bits"],
+            should_abort=lambda: bc.tip().hash != prev.hash,
+        )
+        elapsed = time.time() - t0
+        self.last_mining = {
+            "height": b.height,
+            "bits": b.extra["bits"],
+            "hashes": hashes,
+            "elapsed_ms": int(elapsed * 1000),
+            "hashrate": int(hashes / elapsed) if elapsed > 0 else 0,
+            "found": nonce is not None,
+        }
+        if nonce is None:
+            return None  # bị hủy do block cạnh tranh (hoặc hết nonce)
+
+        b.nonce = nonce
+        body = b.__dict__.copy()
+        body["hash"] = ""
+        b.hash = hash_block(body)
+        return b
+
+    def _work(self, chain: List[Block]) -> int:
+        return sum(2 ** int(b.extra.get("bits", 0)) for b in chain[1:])
+
+    def validate_block(self, block: Block, parent_chain: Optional[List[Block]] = None) -> bool:
+        """parent_chain (chain mà block nối vào) cho phép kiểm tra bits đúng theo retarget."""
+        if self.mode == "mine":
+            bits = block.extra.get("bits")
+            if not isinstance(bits, int) or bits < self.min_bits:
+                print(f"[Node {self.node_id}] FAIL bits h={block.height}, bits={bits}, min={self.min_bits}")
+                return False
+            expected_bits = self._retarget(parent_chain) if parent_chain is not None else bits
+            if bits != expected_bits:
+                print(f"[Node {self.node_id}] FAIL retarget h={block.height}, bits={bits}, expected={expected_bits}")
+                return False
+            if not meets_difficulty_bits(pow_hash(header_bytes(block), block.nonce), bits):
+                print(f"[Node {self.node_id}] FAIL pow h={block.height}, nonce={block.nonce}, bits={bits}")
+                return False
+        else:
+            expected = self._ticket_for(block.height)
+            actual = block.extra.get("ticket")
+            if actual != expected:
+                print(f"[Node {self.node_id}] FAIL ticket h={block.height}, expected={expected}, got={actual}")
+                return False
 
         body = block.__dict__.copy()
         body["hash"] = ""
@@ -55,8 +146,32 @@ class PoWConsensus:
         if recomputed != block.hash:
             print(f"[Node {self.node_id}] FAIL hash h={block.height}, expected={block.hash}, got={recomputed}")
             return False
-        
+
         return True
 
     def select_best(self, local_chain: List[Block], candidate_chain: List[Block]) -> List[Block]:
-        return candidate_chain if len(candidate_chain) > len(local_chain) else local_chain
+        if self.mode != "mine":
+            return candidate_chain if len(candidate_chain) > len(local_chain) else local_chain
+
+        # kiểm tra phần fork của candidate (PoW + bits theo retarget) rồi so tổng work
+        fork = 0
+        while (fork < min(len(local_chain), len(candidate_chain))
+               and local_chain[fork].hash == candidate_chain[fork].hash):
+            fork += 1
+        if fork == 0:
+            return local_chain  # khác genesis
+        # chain ngắn hơn có thể có work lớn hơn (độ khó giảm): không revert block đã final
+        final_h = len(local_chain) - 1 - self.finality_depth
+        if final_h >= 0 and (len(candidate_chain) <= final_h
+                             or candidate_chain[final_h].hash != local_chain[final_h].hash):
+            return local_chain
+        for i in range(fork, len(candidate_chain)):
+            b = candidate_chain[i]
+            if b.prev_hash != candidate_chain[i - 1].hash or not self.validate_block(b, candidate_chain[:i]):
+                return local_chain
+        return candidate_chain if self._work(candidate_chain) > self._work(local_chain) else local_chain
+
+    def close(self):
+        if self._searcher is not None:
+            self._searcher.close()
+            self._searcher = None
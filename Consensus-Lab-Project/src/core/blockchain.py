@@ -89,6 +89,11 @@ class Blockchain:
             print(f"[DEBUG add_block] height mismatch: got {block.height}, expected {self.length()}")
             return False
 
+        # apply txs (double-spend => reject cả block)
+        if not self.apply_block(block):
+            print(f"[DEBUG add_block] invalid transactions in block {block.height}")
+            return False
+
         self.chain.append(block)
         return True
 
@@ -10,3 +10,7 @@ def hash_block(block_dict: dict) -> str:
 
 def meets_difficulty(h: str, difficulty: int) -> bool:
     return h.startswith('0' * max(0, difficulty))
+
+def meets_difficulty_bits(h: str, bits: int) -> bool:
+    """Finer-grained variant of meets_difficulty: require `bits` leading zero bits."""
+    return bits <= 0 or int(h, 16) >> (256 - bits) == 0
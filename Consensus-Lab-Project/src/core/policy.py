@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .crypto import _canonical
+
+@dataclass
+class BlockSizePolicy:
+    """
+    Chọn tx từ mempool (FIFO) cho block mới:
+      - max_txs: số tx tối đa mỗi block (None = không giới hạn)
+      - max_bytes: tổng kích thước tx đã encode tối đa (None = không giới hạn)
+    Tx không áp dụng được trên balances hiện tại (double-spend, thiếu tiền) hoặc tự nó đã
+    lớn hơn max_bytes bị trả về riêng để node loại khỏi mempool. Tx chỉ không còn vừa
+    phần byte còn lại thì được bỏ qua, giữ trong mempool cho block sau.
+    """
+    max_txs: Optional[int] = 5
+    max_bytes: Optional[int] = None
+
+    def oversize(self, tx: dict) -> bool:
+        return self.max_bytes is not None and len(_canonical(tx)) > self.max_bytes
+
+    def select(self, mempool: List[dict], balances: Dict[int, int]) -> Tuple[List[dict], List[dict]]:
+        bal = dict(balances)
+        picked: List[dict] = []
+        dropped: List[dict] = []
+        size = 0
+        for tx in mempool:
+            if self.max_txs is not None and len(picked) >= self.max_txs:
+                break
+            sender, receiver, amount = int(tx["sender"]), int(tx["receiver"]), int(tx["amount"])
+            if amount <= 0 or sender == receiver or bal.get(sender, 0) < amount:
+                dropped.append(tx)
+                continue
+            if self.oversize(tx):
+                dropped.append(tx)
+                continue
+            n = len(_canonical(tx))
+            if self.max_bytes is not None and size + n > self.max_bytes:
+                continue
+            size += n
+            bal[sender] -= amount
+            bal[receiver] = bal.get(receiver, 0) + amount
+            picked.append(tx)
+        return picked, dropped
@@ -0,0 +1,51 @@
+import json
+from typing import List
+
+class ChainCache:
+    """
+    Cache JSON bytes của từng block để trả lời chain_req mà không encode lại cả chain:
+    - chain chỉ nối thêm block mới => chỉ encode các block mới
+    - reorg => giữ prefix chung, encode lại phần suffix khác nhau
+    Bytes trả về giống hệt json.dumps(msg) + '\\n' của message chain_resp.
+    """
+
+    PREFIX = b'{"typ": "chain_resp", "data": {"chain": ['
+    SEP = b', '
+    SUFFIX = b']}}\n'
+
+    def __init__(self):
+        self._hashes: List[str] = []
+        self._frags: List[bytes] = []
+
+    def _common_prefix(self, chain) -> int:
+        n = min(len(chain), len(self._hashes))
+        if n == 0 or self._hashes[n - 1] == chain[n - 1].hash:
+            return n  # append-only (trường hợp thường gặp)
+        # hash block phụ thuộc prev_hash => khớp tại i thì khớp toàn bộ [0, i]: tìm nhị phân
+        lo, hi = 0, n - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._hashes[mid] == chain[mid].hash:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def sync(self, chain) -> None:
+        keep = self._common_prefix(chain)
+        del self._hashes[keep:]
+        del self._frags[keep:]
+        for blk in chain[keep:]:
+            self._hashes.append(blk.hash)
+            self._frags.append(json.dumps(blk.__dict__).encode())
+
+    def chain_resp_parts(self, chain) -> List[bytes]:
+        """Các đoạn bytes của message chain_resp, dùng cho send_parts (scatter-gather)."""
+        self.sync(chain)
+        parts = [self.PREFIX]
+        for i, frag in enumerate(self._frags):
+            if i:
+                parts.append(self.SEP)
+            parts.append(frag)
+        parts.append(self.SUFFIX)
+        return parts
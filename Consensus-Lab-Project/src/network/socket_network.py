@@ -18,6 +18,38 @@ def send_json(host, port, obj, timeout=3.0):
         s.close()
     return True
 
+IOV_MAX = 1024  # giới hạn số buffer cho mỗi lần sendmsg
+
+def _sendmsg_all(s, parts):
+    views = [memoryview(p) for p in parts if p]
+    i = 0
+    while i < len(views):
+        sent = s.sendmsg(views[i:i + IOV_MAX])
+        while sent and i < len(views):
+            if sent >= len(views[i]):
+                sent -= len(views[i])
+                i += 1
+            else:
+                views[i] = views[i][sent:]
+                sent = 0
+
+def send_parts(host, port, parts, timeout=3.0):
+    """Như send_json nhưng gửi các đoạn bytes đã encode sẵn (scatter-gather nếu có sendmsg)."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect((host, port))
+        if hasattr(s, "sendmsg"):
+            _sendmsg_all(s, parts)
+        else:  # Windows không có sendmsg
+            s.sendall(b"".join(parts))
+    except Exception as e:
+        print(f"[send_fail] host={host} port={port} err={e}")
+        return False
+    finally:
+        s.close()
+    return True
+
 class Server(threading.Thread):
     def __init__(self, port, handler):
         super().__init__(daemon=True)
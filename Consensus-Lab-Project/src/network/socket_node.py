@@ -2,9 +2,12 @@ import json, time, threading, random, os, sys
 from typing import List, Dict, Any, Optional
 from src.core.block import Block
 from core.blockchain import Blockchain
+from core.policy import BlockSizePolicy
 from consensus.pow import PoWConsensus
 from consensus.hybrid import HybridConsensus
-from .socket_network import Server, send_json, DEFAULT_PORTS
+from simulator.workload import Workload
+from .socket_network import Server, send_json, send_parts, DEFAULT_PORTS
+from .chain_cache import ChainCache
 
 class Node:
     scenario: Any = None
@@ -14,11 +17,17 @@ class Node:
         self.config = config
         self.peers = peers
         self.log_path = log_path
+        self.ports: List[int] = list(config.get("ports", DEFAULT_PORTS))  # node_id -> port
         self.bc = Blockchain(initial_balances=config.get("initial_balances"))
         self.bc.genesis()
         self.mempool: List[dict] = []
+        self.workload = Workload(node_id, len(self.ports), config.get("workload"), int(config.get("seed", 0)))
+        self.block_policy = BlockSizePolicy(config.get("max_block_txs", 5), config.get("max_block_bytes"))
+        self.tx_stats = {"created": 0, "included": 0, "dropped": 0}  # đếm trong cửa sổ workload_stats
+        self.last_stats_ms = int(time.time() * 1000)
+        self.chain_cache = ChainCache()  # bytes đã encode của từng block, phục vụ chain_req
         self.last_broadcast = 0
-        self.server = Server(DEFAULT_PORTS[node_id], self.on_message)
+        self.server = Server(self.ports[node_id], self.on_message)
         if consensus == 'pow':
             self.cons = PoWConsensus(self.node_id, self.config)
         else:
@@ -48,13 +57,15 @@ class Node:
 
     def stop(self):
         self.server.stop()
+        if hasattr(self.cons, "close"):
+            self.cons.close()
 
     def connect_peers(self):
         # announce ourselves
         for p in self.peers:
             self._send(p, {"typ":"hello","data":{"from": self.node_id}})
 
-    def _send(self, port: int, obj: dict):
+    def _send(self, port: int, obj: dict, parts: Optional[List[bytes]] = None):
         try:
             # Delay nếu có
             if hasattr(self, "scenario") and self.scenario and self.scenario.delays_ms:
@@ -64,15 +75,17 @@ class Node:
 
             # Partition nếu có
             if hasattr(self, "scenario") and self.scenario and self.scenario.partition:
-                g1 = {0, 1}
-                g2 = {2, 3, 4}
-                if (self.node_id in g1 and port in [9002, 9003, 9004]) or \
-                (self.node_id in g2 and port in [9000, 9001]):
+                # 2/5 node đầu (node 0,1 khi có 5 node) tách khỏi phần còn lại
+                split = max(1, len(self.ports) * 2 // 5)
+                if (self.node_id < split) != (self.ports.index(port) < split):
                     self.log("send_drop", peer=port, typ=obj.get("typ"))
                     return  # message bị drop
 
-            # Gửi thật sự
-            send_json("127.0.0.1", port, obj)
+            # Gửi thật sự (parts: message đã encode sẵn)
+            if parts is not None:
+                send_parts("127.0.0.1", port, parts)
+            else:
+                send_json("127.0.0.1", port, obj)
             
         except Exception as e:
             self.log("send_fail", peer=port, error=str(e))
@@ -86,19 +99,42 @@ class Node:
 
     # ------------- Transactions -------------
     def maybe_create_tx(self):
-        """Occasionally create a small tx from this node to a random peer."""
-        if random.random() < 0.25:  # 25% chance per tick
-            targets = [p for p in range(len(DEFAULT_PORTS)) if p != self.node_id]
-            if not targets:
-                return
-            receiver = random.choice(targets)
-            balance = self.bc.balances.get(self.node_id, 0)
-            if balance <= 1:
-                return
-            amount = max(1, balance // random.randint(10, 20))  # small amount
-            tx = {"sender": self.node_id, "receiver": receiver, "amount": amount}
-            self.mempool.append(tx)
+        """Create txs from the configured workload (default: legacy 25% chance per tick)."""
+        burst_pos: Dict[str, int] = {}
+        for tx in self.workload.generate(time.time(), self.bc.balances):
+            self.tx_stats["created"] += 1
             self.log("tx_create", **tx)
+            # double-spend: chia các tx xung đột cho các proposer khác nhau (tx thứ k -> node_id+k)
+            # để các block cạnh tranh chứa tx khác nhau và fork resolution phải chọn một
+            if "burst" in tx:
+                k = burst_pos[tx["burst"]] = burst_pos.get(tx["burst"], -1) + 1
+                target = (self.node_id + k) % len(self.ports)
+                if target != self.node_id:
+                    self._send(self.ports[target], {"typ": "tx", "data": {"tx": tx, "from": self.node_id}})
+                    self.log("tx_forward", id=tx["id"], to_node=target)
+                    continue
+            self.mempool.append(tx)
+
+    def _remove_from_mempool(self, txs: List[dict]):
+        ids = {tx.get("id") for tx in txs}
+        self.mempool = [tx for tx in self.mempool if tx.get("id") not in ids]
+
+    def _log_included(self, b: Block):
+        now = time.time()
+        for tx in b.transactions:
+            if "ts" in tx:
+                self.log("tx_include", id=tx.get("id"), height=b.height, h=b.hash[:8],
+                         latency_ms=round((now - tx["ts"]) * 1000.0, 3))
+        self.tx_stats["included"] += len(b.transactions)
+
+    def _log_workload_stats(self, now_ms: int):
+        window = now_ms - self.last_stats_ms
+        if window < 1000:
+            return
+        self.log("workload_stats", window_ms=window, mempool=len(self.mempool),
+                 tps=round(self.tx_stats["included"] * 1000.0 / window, 3), **self.tx_stats)
+        self.tx_stats = {"created": 0, "included": 0, "dropped": 0}
+        self.last_stats_ms = now_ms
 
     # ------------- Invariants -------------
     def _check_invariants(self):
@@ -117,6 +153,8 @@ class Node:
                 self.log("invariant_fail", reason="two_final_blocks_same_height", h=h)
                 sys.exit(1)
             # record
+            if h > self.finalized_height:
+                self.log("block_final", height=h, h=hh[:8])
             self.finalized_map[h] = hh
             self.finalized_height = max(self.finalized_height, h)
 
@@ -139,11 +177,13 @@ class Node:
                 return
             b = Block(**bdict)
 
-            if self.cons.validate_block(b):
+            # block nối tiếp tip local => validate kèm chain cha (PoW thật kiểm tra retarget)
+            parent = self.bc.chain if b.prev_hash == self.bc.tip().hash else None
+            if self.cons.validate_block(b, parent):
                 # Case 1: nối tiếp tip local
                 if b.height == self.bc.length() and b.prev_hash == self.bc.tip().hash:
                     if self.bc.add_block(b):
-                        self.mempool = [tx for tx in self.mempool if tx not in b.transactions]
+                        self._remove_from_mempool(b.transactions)
                         self.log("block_accept", height=b.height, h=b.hash[:8], from_node=b.proposer)
                         self._check_invariants()
                     else:
@@ -152,24 +192,30 @@ class Node:
                 # Case 2: block đi xa hơn chain local
                 elif b.height > self.bc.length():
                     sender = b.proposer
-                    peer_port = DEFAULT_PORTS[sender]  # ánh xạ node_id -> port
+                    peer_port = self.ports[sender]  # ánh xạ node_id -> port
                     self.log("block_out_of_sync", height=b.height, from_node=sender)
                     self.ask_chain(peer_port)
 
                 # Case 3: block cùng height nhưng prev không khớp
                 else:
                     sender = b.proposer
-                    peer_port = DEFAULT_PORTS[sender]  # đổi node_id sang port
+                    peer_port = self.ports[sender]  # đổi node_id sang port
                     self.log("block_reject", height=b.height, reason="bad_prev", from_node=sender)
                     self.ask_chain(peer_port)
 
             else:
                 self.log("block_reject", height=b.height, reason="invalid_block")
 
+        elif typ == "tx":
+            tx = data.get("tx")
+            if tx:
+                self.mempool.append(tx)
+                self.log("tx_recv", id=tx.get("id"), from_node=data.get("from"))
+
         elif typ == "chain_req":
-            chain = [blk.__dict__ for blk in self.bc.chain]
+            parts = self.chain_cache.chain_resp_parts(list(self.bc.chain))
             from_id = data.get("from", 0)
-            self._send(DEFAULT_PORTS[from_id], {"typ": "chain_resp", "data": {"chain": chain}})
+            self._send(self.ports[from_id], {"typ": "chain_resp"}, parts=parts)
 
         elif typ == "chain_resp":
             chain_dicts = data.get("chain", [])
@@ -178,7 +224,8 @@ class Node:
             # chọn chain tốt nhất
             best = self.cons.select_best(self.bc.chain, cand)
 
-            if best is cand and len(cand) > len(self.bc.chain):
+            # consensus quyết định có switch hay không (PoW: dài hơn; Hybrid: thêm tie-break)
+            if best is cand:
                 self.bc.chain = cand
                 self.bc.rebuild_state()
                 self.log("chain_switch", new_len=len(cand))
@@ -191,15 +238,32 @@ class Node:
         self.maybe_create_tx()
 
         # Gọi mine_block theo loại consensus
-        mem = self.mempool[:5]
+        mem, dropped = self.block_policy.select(self.mempool, self.bc.balances)
+        if dropped:
+            self._remove_from_mempool(dropped)
+            self.tx_stats["dropped"] += len(dropped)
+            for tx in dropped:
+                self.log("tx_drop", id=tx.get("id"),
+                         reason="oversize" if self.block_policy.oversize(tx) else "unapplicable")
         b = self.cons.mine_block(self.bc, mem)  # PoW trả về Block, Hybrid có thể trả None
+        stats = getattr(self.cons, "last_mining", None)
+        if stats:
+            self.log("mining_stats", **stats)  # hashrate khi chạy PoW thật
+            self.cons.last_mining = None
         if b:
             ok = self.bc.add_block(b)
             if ok:
-                self.mempool = [tx for tx in self.mempool if tx not in b.transactions]
+                self._remove_from_mempool(b.transactions)
                 self.log("block_create", height=b.height, h=b.hash[:8])
+                self._log_included(b)
                 self.broadcast_block(b)
                 self._check_invariants()
+            else:
+                # tip đổi trong lúc mine, hoặc tx không áp dụng được trên balances
+                self.log("block_create_fail", height=b.height, prev=b.prev_hash[:8],
+                         tip=self.bc.tip().hash[:8], txs=len(b.transactions))
+
+        self._log_workload_stats(now_ms)
 
         # đôi khi sync
         if now_ms - self.last_broadcast > 1500:
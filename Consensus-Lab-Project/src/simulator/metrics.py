@@ -0,0 +1,87 @@
+import glob, json, os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+def load_logs(log_dir: str) -> Dict[int, List[dict]]:
+    """Đọc logs/node_<id>.log -> {node_id: [event, ...]} (bỏ qua dòng hỏng do bị kill giữa chừng)."""
+    logs: Dict[int, List[dict]] = {}
+    for path in sorted(glob.glob(os.path.join(log_dir, "node_*.log"))):
+        events = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    pass
+        if events:
+            logs[events[0]["node_id"]] = events
+    return logs
+
+
+def _mean(xs: List[float]) -> Optional[float]:
+    return round(sum(xs) / len(xs), 3) if xs else None
+
+
+def collect_metrics(log_dir: str) -> Dict[str, Any]:
+    """
+    Tổng hợp metric của một lần chạy từ log các node:
+    - blocks_per_s: chiều cao chain chuẩn / thời gian từ lúc start tới block cuối
+    - fork_rate: tỉ lệ block đã tạo nhưng không nằm trong chain chuẩn
+    - finality_latency_ms: trung bình (block_final - block_create) trên mọi node
+    - sustained_tps: số tx nằm trong chain chuẩn / thời gian chạy
+    - inclusion_latency_ms (mean, p95): từ lúc tx đến (ts) tới lúc vào block
+    - max_mempool: backlog mempool lớn nhất trong các event workload_stats
+    Chain chuẩn = chain cuối (event "finish") mà nhiều node nhất cùng có.
+    """
+    logs = load_logs(log_dir)
+    events = [e for evs in logs.values() for e in evs]
+    if not events:
+        return {}
+
+    created: Dict[str, float] = {}
+    for e in events:
+        if e["event"] == "block_create":
+            created.setdefault(e["data"]["h"], e["ts"])
+
+    finals = [tuple(e["data"]["chain"]) for e in events if e["event"] == "finish"]
+    canonical = Counter(finals).most_common(1)[0][0] if finals else ()
+
+    starts = [e["ts"] for e in events if e["event"] == "start"]
+    start = min(starts or [e["ts"] for e in events])
+    block_ts = [e["ts"] for e in events if e["event"] in ("block_create", "block_accept", "chain_switch")]
+    duration = (max(block_ts) - start) if block_ts else 0.0
+    height = len(canonical) - 1 if canonical else max(
+        (e["data"]["height"] for e in events if e["event"] in ("block_create", "block_accept")), default=0)
+
+    latencies = [
+        (e["ts"] - created[e["data"]["h"]]) * 1000.0
+        for e in events
+        if e["event"] == "block_final" and e["data"]["h"] in created
+    ]
+    hashrates = [e["data"]["hashrate"] for e in events if e["event"] == "mining_stats"]
+    # chỉ tính tx nằm trong chain chuẩn (tx trong block bị orphan không được tính)
+    tx_latencies = sorted(e["data"]["latency_ms"] for e in events
+                          if e["event"] == "tx_include" and (not canonical or e["data"]["h"] in canonical))
+    backlogs = [e["data"]["mempool"] for e in events if e["event"] == "workload_stats"]
+    counts = Counter(e["event"] for e in events)
+
+    return {
+        "height": height,
+        "duration_s": round(duration, 3),
+        "blocks_per_s": round(height / duration, 3) if duration > 0 else None,
+        "blocks_created": len(created),
+        "fork_rate": round(sum(1 for h in created if h not in canonical) / len(created), 3)
+        if created and canonical else None,
+        "finality_latency_ms": _mean(latencies),
+        "chain_switches": counts["chain_switch"],
+        "invariant_fails": counts["invariant_fail"],
+        "hashrate": _mean(hashrates),
+        "txs_created": counts["tx_create"],
+        "txs_included": len(tx_latencies),
+        "txs_dropped": counts["tx_drop"],
+        "sustained_tps": round(len(tx_latencies) / duration, 3) if duration > 0 else None,
+        "inclusion_latency_ms": _mean(tx_latencies),
+        "inclusion_latency_p95_ms": tx_latencies[int(0.95 * (len(tx_latencies) - 1))] if tx_latencies else None,
+        "max_mempool": max(backlogs, default=None),
+    }
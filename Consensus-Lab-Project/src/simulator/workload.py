@@ -0,0 +1,94 @@
+import random
+from typing import Any, Dict, List, Optional
+
+class Workload:
+    """
+    Sinh transaction cho một node theo config["workload"]:
+    - mode "legacy" (mặc định): 25% mỗi tick, 1 tx nhỏ từ node này tới peer ngẫu nhiên
+    - mode "poisson": open-loop, tx đến theo quá trình Poisson với tốc độ `tps`;
+      ts của tx là thời điểm đến theo lịch (không phụ thuộc node có kịp xử lý hay không);
+      tps <= 0 => không sinh tx thường (chỉ còn double-spend nếu bật)
+    - skew "uniform" | "zipf": chọn sender/receiver, zipf (zipf_s) dồn tải vào vài tài khoản nóng
+    - double_spend_every_s > 0: định kỳ bắn double_spend_size tx cùng sender, mỗi tx tiêu
+      gần hết balance => nhiều nhất một tx có thể vào chain; các tx cùng "burst" được
+      Node chia cho các proposer khác nhau
+    tps tính cho mỗi node: tổng tải của mạng = số node × tps.
+    Mỗi tx có "id" (node-seq) và "ts" để đo inclusion latency.
+    """
+
+    def __init__(self, node_id: int, n_accounts: int, config: Optional[Dict[str, Any]] = None, seed: int = 0):
+        config = config or {}
+        self.node_id = node_id
+        self.accounts = list(range(n_accounts))
+        self.mode = config.get("mode", "legacy")
+        self.tps = float(config.get("tps", 50))
+        self.skew = config.get("skew", "uniform")
+        self.amount_max = int(config.get("amount_max", 5))
+        self.double_spend_every_s = float(config.get("double_spend_every_s", 0))
+        self.double_spend_size = int(config.get("double_spend_size", 3))
+        s = float(config.get("zipf_s", 1.2))
+        self.weights = [1.0 / (rank + 1) ** s for rank in range(n_accounts)]  # account 0 nóng nhất
+        self.rng = random.Random((seed << 8) ^ node_id)
+        self.seq = 0
+        self.next_arrival: Optional[float] = None
+        self.next_burst: Optional[float] = None
+
+    def _tx(self, sender: int, receiver: int, amount: int, ts: float, **extra) -> dict:
+        self.seq += 1
+        return {"sender": sender, "receiver": receiver, "amount": amount,
+                "id": f"{self.node_id}-{self.seq}", "ts": ts, **extra}
+
+    def _pick(self) -> int:
+        if self.skew == "zipf":
+            return self.rng.choices(self.accounts, weights=self.weights)[0]
+        return self.rng.choice(self.accounts)
+
+    def _pair(self):
+        sender = self._pick()
+        receiver = self._pick()
+        while receiver == sender:
+            receiver = self._pick()
+        return sender, receiver
+
+    def generate(self, now: float, balances: Dict[int, int]) -> List[dict]:
+        if len(self.accounts) < 2:
+            return []
+        if self.mode == "legacy":
+            return self._legacy(now, balances)
+
+        txs = []
+        if self.tps > 0:
+            if self.next_arrival is None:
+                self.next_arrival = now + self.rng.expovariate(self.tps)
+            while self.next_arrival <= now:
+                sender, receiver = self._pair()
+                txs.append(self._tx(sender, receiver, self.rng.randint(1, self.amount_max), self.next_arrival))
+                self.next_arrival += self.rng.expovariate(self.tps)
+
+        if self.double_spend_every_s > 0:
+            if self.next_burst is None:
+                self.next_burst = now + self.double_spend_every_s
+            if now >= self.next_burst:
+                txs.extend(self._double_spend(now, balances))
+                self.next_burst = now + self.double_spend_every_s
+        return txs
+
+    def _double_spend(self, now: float, balances: Dict[int, int]) -> List[dict]:
+        sender = self._pick()
+        amount = max(1, balances.get(sender, 0) * 9 // 10)
+        burst = f"{self.node_id}-ds{self.seq}"
+        others = [a for a in self.accounts if a != sender]
+        return [self._tx(sender, self.rng.choice(others), amount, now, burst=burst)
+                for _ in range(self.double_spend_size)]
+
+    def _legacy(self, now: float, balances: Dict[int, int]) -> List[dict]:
+        # giữ nguyên hành vi cũ của Node.maybe_create_tx (dùng random toàn cục đã seed)
+        if random.random() < 0.25:  # 25% chance per tick
+            targets = [p for p in self.accounts if p != self.node_id]
+            receiver = random.choice(targets)
+            balance = balances.get(self.node_id, 0)
+            if balance <= 1:
+                return []
+            amount = max(1, balance // random.randint(10, 20))  # small amount
+            return [self._tx(self.node_id, receiver, amount, now)]
+        return []
@@ -0,0 +1,180 @@
+"""
+Parameter sweep: chạy lưới consensus × scenario × seed × nodes × block_time_ms × stakes.
+Mỗi cell là một mạng main.py đầy đủ, có dải port và thư mục làm việc riêng
+(logs/, ready_nodes.txt, done_nodes.txt). Các cell chạy song song trên process pool.
+Cell nào đã có result.json với status "ok" và cùng tham số (kể cả --target-blocks, --set)
+sẽ được bỏ qua khi chạy lại (resume).
+
+Ví dụ:
+    python sweep.py --consensus pow hybrid --scenario delays partition --seeds 1 2 3 --workers 2
+"""
+import argparse, csv, hashlib, itertools, json, os, shutil, signal, subprocess, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE, "src"))
+
+from simulator.metrics import collect_metrics
+
+MAIN = os.path.join(BASE, "main.py")
+COLUMNS = ["id", "consensus", "scenario", "seed", "nodes", "block_time_ms", "stakes",
+           "target_blocks", "sets", "status",
+           "wall_s", "height", "duration_s", "blocks_per_s", "blocks_created", "fork_rate",
+           "finality_latency_ms", "chain_switches", "invariant_fails", "hashrate",
+           "txs_created", "txs_included", "txs_dropped", "sustained_tps",
+           "inclusion_latency_ms", "inclusion_latency_p95_ms", "max_mempool"]
+
+
+def expand_grid(args) -> list:
+    cells = []
+    grid = itertools.product(args.consensus, args.scenario, args.seeds, args.nodes,
+                             args.block_time_ms or [None])
+    stake_lists = [[int(x) for x in st.split(",")] for st in args.stakes or []]
+    for cons, scn, seed, nodes, bt in grid:
+        # stakes chỉ có ý nghĩa với hybrid; bỏ các list không khớp số node
+        options = [None]
+        if cons == "hybrid" and stake_lists:
+            options = [st for st in stake_lists if len(st) == nodes]
+            if not options:
+                print(f"[sweep] no --stakes list has {nodes} entries; hybrid n={nodes} uses config stakes")
+                options = [None]
+        for stakes in options:
+            cells.append(_cell(cons, scn, seed, nodes, bt, stakes, args.target_blocks, args.set))
+    return cells
+
+
+def _cell(cons, scn, seed, nodes, bt, stakes, target_blocks, sets) -> dict:
+    cell_id = f"{cons}-{scn}-s{seed}-n{nodes}-bt{bt or 'cfg'}-st{'_'.join(map(str, stakes)) if stakes else 'cfg'}"
+    cell_id += f"-tb{target_blocks}"
+    if sets:  # --set có thể dài/chứa ký tự đặc biệt: dùng hash ngắn trong id
+        cell_id += "-x" + hashlib.sha1(json.dumps(sets).encode()).hexdigest()[:8]
+    return {"id": cell_id, "consensus": cons, "scenario": scn, "seed": seed,
+            "nodes": nodes, "block_time_ms": bt, "stakes": stakes,
+            "target_blocks": target_blocks, "sets": list(sets)}
+
+
+def run_cell(cell: dict, cell_dir: str, base_port: int, timeout: float) -> dict:
+    shutil.rmtree(cell_dir, ignore_errors=True)
+    os.makedirs(cell_dir)
+
+    cmd = [sys.executable, MAIN, "--consensus", cell["consensus"], "--scenario", cell["scenario"],
+           "--seed", str(cell["seed"]), "--target-blocks", str(cell["target_blocks"]),
+           "--nodes", str(cell["nodes"]), "--base-port", str(base_port)]
+    if cell["block_time_ms"] is not None:
+        cmd += ["--set", f"block_time_ms={cell['block_time_ms']}"]
+    if cell["stakes"] is not None:
+        cmd += ["--set", f"stakes={json.dumps(cell['stakes'])}"]
+    for s in cell["sets"]:
+        cmd += ["--set", s]
+
+    t0 = time.time()
+    procs = []
+    for i in range(cell["nodes"]):
+        out = open(os.path.join(cell_dir, f"stdout_{i}.txt"), "w")
+        # session riêng: kill cả nhóm (gồm worker mining) thay vì chỉ process main.py
+        procs.append(subprocess.Popen(cmd + ["--node-id", str(i)], cwd=cell_dir,
+                                      stdout=out, stderr=subprocess.STDOUT,
+                                      start_new_session=hasattr(os, "killpg")))
+        out.close()
+
+    status = "ok"
+    for p in procs:
+        try:
+            p.wait(timeout=max(0.0, t0 + timeout - time.time()))
+        except subprocess.TimeoutExpired:
+            status = "timeout"
+            break
+    for p in procs:
+        _kill_group(p)
+    if status == "ok" and any(p.returncode != 0 for p in procs):
+        status = "failed"
+
+    result = dict(cell, status=status, wall_s=round(time.time() - t0, 3))
+    result.update(collect_metrics(os.path.join(cell_dir, "logs")))
+    with open(os.path.join(cell_dir, "result.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def _kill_group(p: subprocess.Popen):
+    """Dừng node và mọi process con còn sót lại trong nhóm của nó (kể cả khi node đã thoát)."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(p.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    elif p.poll() is None:
+        p.kill()
+    p.wait()
+
+
+def load_result(cell_dir: str):
+    path = os.path.join(cell_dir, "result.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_table(out_dir: str, results: list):
+    results = sorted(results, key=lambda r: r["id"])
+    with open(os.path.join(out_dir, "results.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    with open(os.path.join(out_dir, "results.csv"), "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        w.writeheader()
+        for r in results:
+            w.writerow(dict(r, stakes=",".join(map(str, r["stakes"])) if r.get("stakes") else "",
+                            sets=" ".join(r.get("sets") or [])))
+
+    shown = ["id", "status", "blocks_per_s", "fork_rate", "finality_latency_ms", "sustained_tps"]
+    print("  ".join(f"{c:>20}" if c != "id" else f"{c:<48}" for c in shown))
+    for r in results:
+        print("  ".join(f"{str(r.get(c)):>20}" if c != "id" else f"{r[c]:<48}" for c in shown))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a consensus × scenario × seed parameter sweep")
+    parser.add_argument("--consensus", nargs="+", choices=["pow", "hybrid"], default=["pow", "hybrid"])
+    parser.add_argument("--scenario", nargs="+", choices=["delays", "partition"], default=["delays", "partition"])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[42])
+    parser.add_argument("--nodes", nargs="+", type=int, default=[5])
+    parser.add_argument("--block-time-ms", nargs="+", type=int, default=None)
+    parser.add_argument("--stakes", nargs="+", default=None, help="comma-separated stake lists (hybrid), e.g. 200,300,150,250,100")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=JSON", help="extra config override for every cell")
+    parser.add_argument("--target-blocks", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=180.0, help="seconds per cell")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--base-port", type=int, default=20000)
+    parser.add_argument("--out", default=os.path.join("sweeps", "default"))
+    parser.add_argument("--rerun", action="store_true", help="ignore existing results instead of resuming")
+    args = parser.parse_args()
+
+    cells = expand_grid(args)
+    os.makedirs(args.out, exist_ok=True)
+    stride = max(args.nodes)  # mỗi cell một dải port riêng
+
+    results, todo = [], []
+    for idx, cell in enumerate(cells):
+        cell_dir = os.path.abspath(os.path.join(args.out, cell["id"]))
+        prev = None if args.rerun else load_result(cell_dir)
+        # chỉ dùng lại kết quả chạy với đúng tham số của cell
+        if prev and prev.get("status") == "ok" and all(prev.get(k) == v for k, v in cell.items()):
+            results.append(prev)
+        else:
+            todo.append((cell, cell_dir, args.base_port + idx * stride))
+    print(f"[sweep] {len(cells)} cells, {len(results)} done, {len(todo)} to run, workers={args.workers}")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futs = {pool.submit(run_cell, cell, cell_dir, port, args.timeout): cell
+                for cell, cell_dir, port in todo}
+        for f in as_completed(futs):
+            r = f.result()
+            results.append(r)
+            print(f"[sweep] {r['id']}: {r['status']} ({r['wall_s']}s)", flush=True)
+
+    write_table(args.out, results)
+
+
+if __name__ == "__main__":
+    main()